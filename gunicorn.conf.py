@@ -0,0 +1,8 @@
+# Gunicorn settings, picked up automatically by `gunicorn main:app`.
+# Size these with `python -m loadtest.bench_workers` (see README).
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
@@ -0,0 +1,262 @@
+"""Pluggable LLM backends used for AI alerts, suggestions and /ask-ai"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
+DEFAULT_MODEL = "meta/llama-3.1-8b-instruct"
+
+# /v1/completions takes raw text, so batched prompts must be wrapped in the
+# model's chat template by hand to get the same answers as /v1/chat/completions.
+# Keyed by a substring of the model name; the server adds the BOS token itself.
+CHAT_TEMPLATES = {
+    'llama-3': "<|start_header_id|>user<|end_header_id|>\n\n{prompt}<|eot_id|>"
+               "<|start_header_id|>assistant<|end_header_id|>\n\n",
+}
+
+# Status codes meaning the server has no usable list-prompt /v1/completions route
+UNSUPPORTED_BATCH_STATUSES = (400, 404, 405, 422)
+
+
+class LLMError(Exception):
+    """Raised when the upstream model cannot produce a completion"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def chat_template_for(model):
+    for key, template in CHAT_TEMPLATES.items():
+        if key in model.lower():
+            return template
+    return None
+
+
+class LLMBackend:
+    """Base interface: turn a prompt into completion text or raise LLMError"""
+
+    def complete(self, prompt, temperature=0.7, max_tokens=500, top_p=1, timeout=15):
+        raise NotImplementedError
+
+    def complete_batch(self, prompts, temperature=0.7, max_tokens=500, top_p=1, timeout=15):
+        """Complete several prompts sharing the same sampling settings.
+
+        Returns one entry per prompt: the completion text, or an LLMError.
+        """
+        results = []
+        for prompt in prompts:
+            try:
+                results.append(self.complete(prompt, temperature, max_tokens, top_p, timeout))
+            except LLMError as e:
+                results.append(e)
+        return results
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any OpenAI-style chat completions API (NVIDIA, vLLM, the local stub)"""
+
+    def __init__(self, api_url=DEFAULT_API_URL, api_key=None, model=DEFAULT_MODEL, pool_size=32, batch_template=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        # complete_batch only uses the list-prompt route when a template is known
+        self.batch_template = batch_template or chat_template_for(model)
+        self.batch_supported = self.batch_template is not None
+        # Reuse connections across requests; sized for threaded workers
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _post(self, url, payload, timeout):
+        try:
+            response = self.session.post(url, headers=self._headers(), json=payload, timeout=timeout)
+        except requests.RequestException as e:
+            raise LLMError(f"LLM request failed: {e}") from e
+        if response.status_code != 200:
+            raise LLMError(f"LLM API error: {response.status_code} - {response.text[:200]}", response.status_code)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise LLMError(f"LLM response is not JSON: {response.text[:200]}") from e
+
+    def complete(self, prompt, temperature=0.7, max_tokens=500, top_p=1, timeout=15):
+        data = self._post(self.api_url, {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p,
+            "stream": False
+        }, timeout)
+        try:
+            return data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Malformed LLM response: {e}") from e
+
+    def _complete_each(self, prompts, temperature, max_tokens, top_p, timeout):
+        """One chat call per prompt, all in flight at once so none waits on the others"""
+        if len(prompts) == 1:
+            return super().complete_batch(prompts, temperature, max_tokens, top_p, timeout)
+        with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix='llm-fallback') as pool:
+            return list(pool.map(
+                lambda prompt: super(OpenAICompatibleBackend, self).complete_batch(
+                    [prompt], temperature, max_tokens, top_p, timeout)[0],
+                prompts
+            ))
+
+    def complete_batch(self, prompts, temperature=0.7, max_tokens=500, top_p=1, timeout=15):
+        """Send all prompts in one call using the list-prompt form of /v1/completions.
+
+        Falls back to concurrent chat calls, one per prompt, when there is a
+        single prompt, no chat template for the model, or the server turns out
+        not to support it.
+        """
+        if len(prompts) == 1 or not self.batch_supported:
+            return self._complete_each(prompts, temperature, max_tokens, top_p, timeout)
+
+        batch_url = self.api_url.replace('/chat/completions', '/completions')
+        try:
+            data = self._post(batch_url, {
+                "model": self.model,
+                "prompt": [self.batch_template.format(prompt=prompt) for prompt in prompts],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "top_p": top_p,
+                "stream": False
+            }, timeout)
+        except LLMError as e:
+            if e.status_code in UNSUPPORTED_BATCH_STATUSES:
+                logger.warning(f"{batch_url} rejected a list-prompt batch ({e}); "
+                               "falling back to one chat call per prompt")
+                self.batch_supported = False
+                return self._complete_each(prompts, temperature, max_tokens, top_p, timeout)
+            return [LLMError(f"Batch call failed: {e}", e.status_code) for _ in prompts]
+
+        results = [LLMError("Missing completion in batch response") for _ in prompts]
+        for choice in data.get('choices', []):
+            index = choice.get('index')
+            if isinstance(index, int) and 0 <= index < len(prompts):
+                results[index] = choice.get('text', '')
+        return results
+
+
+class BatchingBackend(LLMBackend):
+    """Groups prompts from concurrent requests into one upstream batch call.
+
+    Callers block on their own prompt as usual; a dispatcher thread waits up to
+    ``window`` seconds for more prompts with the same sampling settings (or
+    until ``max_batch_size`` is reached) and sends them together, using at
+    most ``max_in_flight`` concurrent upstream calls.
+    """
+
+    def __init__(self, backend, window=0.02, max_batch_size=16, max_in_flight=4):
+        self.backend = backend
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='llm-batch')
+        self._thread = threading.Thread(target=self._run, name='llm-batcher', daemon=True)
+        self._thread.start()
+
+    def complete(self, prompt, temperature=0.7, max_tokens=500, top_p=1, timeout=15):
+        # Once the server has rejected list prompts, queueing only adds latency
+        if not getattr(self.backend, 'batch_supported', True):
+            return self.backend.complete(prompt, temperature, max_tokens, top_p, timeout)
+        future = Future()
+        self._queue.put(((temperature, max_tokens, top_p), prompt, timeout, future))
+        # Allow for time spent waiting in the batch window on top of the request itself
+        try:
+            result = future.result(timeout=timeout + self.window + 1)
+        except FutureTimeoutError as e:
+            raise LLMError("Timed out waiting for batched LLM response") from e
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for item in pending:
+                groups.setdefault(item[0], []).append(item)
+
+            for (temperature, max_tokens, top_p), items in groups.items():
+                self._executor.submit(self._dispatch, items, temperature, max_tokens, top_p)
+
+    def _dispatch(self, items, temperature, max_tokens, top_p):
+        prompts = [prompt for _, prompt, _, _ in items]
+        timeout = max(item_timeout for _, _, item_timeout, _ in items)
+        logger.debug(f"Dispatching LLM batch of {len(prompts)} prompts")
+        try:
+            results = self.backend.complete_batch(prompts, temperature, max_tokens, top_p, timeout)
+        except Exception as e:
+            results = [LLMError(f"Batch call failed: {e}") for _ in items]
+        for (_, _, _, future), result in zip(items, results):
+            future.set_result(result)
+
+
+def backend_from_env():
+    """Build the configured backend, or None when no LLM is available.
+
+    LLM_API_URL points at any OpenAI-compatible endpoint (defaults to NVIDIA);
+    LLM_API_KEY / NVIDIA_API_KEY authenticate it. A custom LLM_API_URL without
+    a key is allowed so a local stand-in server can be used. LLM_BATCHING=1
+    wraps the backend in a BatchingBackend, but only for an explicit
+    LLM_API_URL (the NVIDIA API has no list-prompt /v1/completions route) and
+    a model whose chat template is known or given in LLM_BATCH_TEMPLATE.
+    """
+    api_url = os.environ.get('LLM_API_URL')
+    api_key = os.environ.get('LLM_API_KEY') or os.environ.get('NVIDIA_API_KEY')
+    if not api_url and not api_key:
+        return None
+
+    backend = OpenAICompatibleBackend(
+        api_url=api_url or DEFAULT_API_URL,
+        api_key=api_key,
+        model=os.environ.get('LLM_MODEL', DEFAULT_MODEL),
+        batch_template=os.environ.get('LLM_BATCH_TEMPLATE')
+    )
+
+    if os.environ.get('LLM_BATCHING', '').lower() in ('1', 'true', 'yes'):
+        if not api_url:
+            logger.warning("LLM_BATCHING ignored: the default NVIDIA API does not accept list prompts. "
+                           "Set LLM_API_URL to a server that does (e.g. vLLM).")
+            return backend
+        if backend.batch_template is None:
+            logger.warning(f"LLM_BATCHING ignored: no chat template known for model {backend.model}. "
+                           "Set LLM_BATCH_TEMPLATE (with a {prompt} placeholder).")
+            return backend
+        logger.warning(f"LLM_BATCHING enabled: batches go to {api_url.replace('/chat/completions', '/completions')} "
+                       "as list prompts with a hand-applied chat template; if the server rejects them, "
+                       "requests fall back to one chat call each")
+        backend = BatchingBackend(
+            backend,
+            window=float(os.environ.get('LLM_BATCH_WINDOW_MS', 20)) / 1000,
+            max_batch_size=int(os.environ.get('LLM_BATCH_MAX_SIZE', 16)),
+            max_in_flight=int(os.environ.get('LLM_BATCH_MAX_IN_FLIGHT', 4))
+        )
+    return backend
@@ -0,0 +1,110 @@
+"""Measure /ask-ai throughput with and without LLM prompt batching.
+
+Starts the stub LLM and the Flask app (threaded) in-process, then fires
+concurrent /ask-ai requests against each backend configuration.
+
+Usage:
+    python -m loadtest.bench_batching --clients 32 --requests 256
+"""
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from werkzeug.serving import make_server
+
+import main
+from llm import OpenAICompatibleBackend, BatchingBackend
+from loadtest.llm_stub import start_in_thread
+
+ASK_PAYLOAD = {
+    'query': 'Where am I wasting the most money?',
+    'results': {
+        'transaction_count': 120,
+        'total_waste': 4520.5,
+        'category_summary': {
+            'repeating_charges': {'count': 4, 'total': 2100},
+            'micro_transactions': {'count': 37, 'total': 1800},
+            'fees': {'count': 6, 'total': 420},
+            'penalties': {'count': 1, 'total': 200.5}
+        },
+        'top_merchants': [{'name': 'SWIGGY', 'amount': 1200, 'count': 14}]
+    }
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_load(app_url, clients, total_requests):
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=clients))
+
+    def one_request(_):
+        start = time.perf_counter()
+        response = session.post(f"{app_url}/ask-ai", json=ASK_PAYLOAD, timeout=60)
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in results]
+    return {
+        'ok': sum(1 for status, _ in results if status == 200),
+        'rps': total_requests / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95)
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub seconds per upstream call')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='stub calls served at once')
+    parser.add_argument('--batch-window-ms', type=float, default=20)
+    parser.add_argument('--batch-max-size', type=int, default=16)
+    args = parser.parse_args()
+
+    # Per-request access logs would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    stub, stub_url = start_in_thread(latency=args.latency, max_concurrency=args.max_concurrency)
+    api_url = f"{stub_url}/v1/chat/completions"
+
+    app_server = make_server('127.0.0.1', 0, main.app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    backends = {
+        'unbatched': OpenAICompatibleBackend(api_url=api_url),
+        'batched': BatchingBackend(
+            OpenAICompatibleBackend(api_url=api_url),
+            window=args.batch_window_ms / 1000,
+            max_batch_size=args.batch_max_size
+        )
+    }
+
+    print(f"{args.requests} /ask-ai requests, {args.clients} clients, "
+          f"stub latency {args.latency}s x {args.max_concurrency} slots")
+    print(f"{'mode':<10} {'ok':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'upstream calls':>15}")
+    for name, backend in backends.items():
+        main.llm_backend = backend
+        calls_before = requests.get(f"{stub_url}/stats").json()['calls']
+        result = run_load(app_url, args.clients, args.requests)
+        calls = requests.get(f"{stub_url}/stats").json()['calls'] - calls_before
+        print(f"{name:<10} {result['ok']:>5} {result['rps']:>8.1f} "
+              f"{result['p50'] * 1000:>8.0f} {result['p95'] * 1000:>8.0f} {calls:>15}")
+
+    app_server.shutdown()
+    stub.shutdown()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,79 @@
+"""Track worker RSS while extracting a long scanned statement.
+
+Runs extract_transactions() on a generated scanned PDF in a child process,
+once with the default OCR path and once with LOW_MEMORY_OCR=1, sampling the
+child's RSS from /proc (Linux only). A flat profile means memory stays
+bounded regardless of page count.
+
+Without Tesseract installed, pass --render-only: OCR is replaced by a no-op
+so only page rendering and pdfplumber's page caches are measured.
+
+Usage:
+    python -m loadtest.bench_ocr_memory --pages 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from loadtest.bench_workers import REPO_ROOT, rss_mb, tesseract_available
+from loadtest.statements import write_scanned_statement
+
+CHILD_SCRIPT = """
+import sys
+import main
+if sys.argv[2] == 'render-only':
+    main.is_tesseract_available = lambda: True
+    main.pytesseract.image_to_string = lambda image: ''
+main.extract_transactions(sys.argv[1])
+"""
+
+
+def profile(pdf_path, low_memory, render_only, page_bitmap_mb):
+    env = dict(os.environ, LOW_MEMORY_OCR='1' if low_memory else '0', OCR_PAGE_BITMAP_MB=str(page_bitmap_mb))
+    process = subprocess.Popen(
+        [sys.executable, '-c', CHILD_SCRIPT, pdf_path, 'render-only' if render_only else 'ocr'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    samples = []
+    start = time.perf_counter()
+    while process.poll() is None:
+        rss = rss_mb(process.pid)
+        if rss is not None:
+            samples.append(rss)
+        time.sleep(0.1)
+    return samples, time.perf_counter() - start, process.returncode
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--dpi', type=int, default=150, help='resolution of the generated scan')
+    parser.add_argument('--page-bitmap-mb', type=float, default=32, help='OCR_PAGE_BITMAP_MB for the low-memory run')
+    parser.add_argument('--render-only', action='store_true', help='skip Tesseract and measure rendering only')
+    args = parser.parse_args()
+
+    if not args.render_only and not tesseract_available():
+        print("Tesseract not found; running with --render-only")
+        args.render_only = True
+
+    workdir = tempfile.mkdtemp(prefix='shadowfinance-ocr-')
+    pdf_path = write_scanned_statement(os.path.join(workdir, 'scanned.pdf'), pages=args.pages, dpi=args.dpi)
+    print(f"{args.pages}-page scan at {args.dpi} dpi ({os.path.getsize(pdf_path) / 1e6:.1f} MB), "
+          f"{'render only' if args.render_only else 'with OCR'}")
+
+    print(f"{'mode':<11} {'secs':>6} {'RSS at 10%':>11} {'25%':>6} {'50%':>6} {'75%':>6} {'90%':>6} {'peak':>6}  MB")
+    for name, low_memory in (('default', False), ('low-memory', True)):
+        samples, elapsed, returncode = profile(pdf_path, low_memory, args.render_only, args.page_bitmap_mb)
+        if returncode != 0 or not samples:
+            print(f"{name:<11} failed (exit code {returncode})")
+            continue
+        at = [samples[min(len(samples) - 1, int(len(samples) * pct))] for pct in (0.1, 0.25, 0.5, 0.75, 0.9)]
+        print(f"{name:<11} {elapsed:>6.1f} {at[0]:>11.0f} {at[1]:>6.0f} {at[2]:>6.0f} {at[3]:>6.0f} "
+              f"{at[4]:>6.0f} {max(samples):>6.0f}")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,294 @@
+"""Compare gunicorn worker classes under a mixed /analyze and /ask-ai load.
+
+For each worker class the app is started under gunicorn with LLM calls
+pointed at the in-process stub LLM, then a fixed number of clients send a
+weighted mix of text statements, scanned statements and /ask-ai questions for
+a fixed duration. Reports throughput, tail latency per request kind, the
+per-stage times from the Server-Timing header (to see which stage saturates
+first) and peak RSS per worker (Linux only, read from /proc). It also uploads
+one statement and pages through its detail lists, to check that every worker
+can serve an analysis that another worker stored.
+
+Usage:
+    python -m loadtest.bench_workers --workers 2 --threads 8 --clients 16 --duration 30
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+from main import DETAIL_SECTIONS
+from loadtest.bench_batching import ASK_PAYLOAD, percentile
+from loadtest.llm_stub import start_in_thread
+from loadtest.statements import write_text_statement, write_scanned_statement
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker_class_args(threads):
+    classes = {
+        'sync': ['-k', 'sync'],
+        'gthread': ['-k', 'gthread', '--threads', str(threads)],
+    }
+    try:
+        import gevent  # noqa: F401
+        classes['gevent'] = ['-k', 'gevent', '--worker-connections', '100']
+    except ImportError:
+        print("gevent is not installed; skipping the gevent worker class")
+    return classes
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def worker_pids(master_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 is the parent pid; the command name in field 2 may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == master_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def parse_server_timing(header):
+    timings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.startswith('dur='):
+            try:
+                timings[name] = float(params[4:])
+            except ValueError:
+                pass
+    return timings
+
+
+def start_gunicorn(port, workers, class_args, env, log_path):
+    log = open(log_path, 'ab')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'main:app',
+         '--bind', f"127.0.0.1:{port}", '--workers', str(workers), '--timeout', '120', *class_args],
+        cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited early; see {log_path}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not start within 30s; see {log_path}")
+
+
+def run_load(base_url, mix, statements, clients, duration, seed):
+    records = []
+    records_lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    def client(client_id):
+        rng = random.Random(seed + client_id)
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(kinds, weights)[0]
+            start = time.perf_counter()
+            try:
+                if kind == 'ask':
+                    response = session.post(f"{base_url}/ask-ai", json=ASK_PAYLOAD, timeout=120)
+                else:
+                    response = session.post(
+                        f"{base_url}/analyze?mode=summary",
+                        files={'file': (f"{kind}.pdf", statements[kind], 'application/pdf')},
+                        timeout=120
+                    )
+                status = response.status_code
+                timings = parse_server_timing(response.headers.get('Server-Timing', ''))
+            except requests.RequestException:
+                status, timings = None, {}
+            with records_lock:
+                records.append((kind, status, time.perf_counter() - start, timings))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - started
+
+
+def check_detail_endpoints(base_url, statement, rounds=20):
+    """Upload once, then fetch every detail list repeatedly on fresh connections.
+
+    Returns (ok, total) over the detail GETs.
+    """
+    response = requests.post(
+        f"{base_url}/analyze?mode=summary",
+        files={'file': ('statement.pdf', statement, 'application/pdf')},
+        timeout=120
+    )
+    total = rounds * len(DETAIL_SECTIONS)
+    if response.status_code != 200:
+        return 0, total
+
+    analysis_id = response.json()['analysis_id']
+    ok = 0
+    for _ in range(rounds):
+        for section in DETAIL_SECTIONS:
+            # No shared session: each GET may be accepted by a different worker
+            detail = requests.get(f"{base_url}/analysis/{analysis_id}/{section}?per_page=10", timeout=30)
+            ok += detail.status_code == 200
+    return ok, total
+
+
+def sample_memory(master_pid, peaks, stop):
+    while not stop.is_set():
+        for pid in worker_pids(master_pid):
+            rss = rss_mb(pid)
+            if rss is not None:
+                peaks[pid] = max(peaks.get(pid, 0), rss)
+        stop.wait(0.5)
+
+
+def report(name, records, elapsed, peaks, detail_check):
+    ok = [r for r in records if r[1] == 200]
+    print(f"\n== {name}: {len(records)} requests in {elapsed:.1f}s, "
+          f"{len(ok) / elapsed:.2f} ok req/s, {len(records) - len(ok)} errors")
+
+    print(f"  {'kind':<8} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind in sorted({r[0] for r in ok}):
+        latencies = [r[2] * 1000 for r in ok if r[0] == kind]
+        print(f"  {kind:<8} {len(latencies):>6} {percentile(latencies, 50):>8.0f} "
+              f"{percentile(latencies, 95):>8.0f} {percentile(latencies, 99):>8.0f}")
+
+    stages = {}
+    for _, _, _, timings in ok:
+        for stage, ms in timings.items():
+            stages.setdefault(stage, []).append(ms)
+    if stages:
+        print(f"  {'stage':<8} {'mean ms':>8} {'p95 ms':>8}")
+        for stage, values in sorted(stages.items()):
+            print(f"  {stage:<8} {sum(values) / len(values):>8.0f} {percentile(values, 95):>8.0f}")
+
+    detail_ok, detail_total = detail_check
+    print(f"  detail endpoints: {detail_ok}/{detail_total} ok"
+          f"{'' if detail_ok == detail_total else '  <-- FAILED: analyses not visible to every worker'}")
+
+    if peaks:
+        values = sorted(peaks.values())
+        print(f"  peak RSS per worker: max {values[-1]:.0f} MB, mean {sum(values) / len(values):.0f} MB "
+              f"across {len(values)} worker processes")
+    else:
+        print("  peak RSS per worker: unavailable (needs /proc)")
+
+
+def tesseract_available():
+    tesseract_cmd = os.environ.get('TESSERACT_CMD')
+    if tesseract_cmd:
+        return os.path.exists(tesseract_cmd)
+    return shutil.which('tesseract') is not None
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--classes', default='sync,gthread,gevent', help='comma-separated worker classes to compare')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load per worker class')
+    parser.add_argument('--text-weight', type=float, default=3)
+    parser.add_argument('--scanned-weight', type=float, default=1)
+    parser.add_argument('--ask-weight', type=float, default=4)
+    parser.add_argument('--text-pages', type=int, default=5)
+    parser.add_argument('--scanned-pages', type=int, default=2)
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='stub seconds per upstream call')
+    parser.add_argument('--llm-concurrency', type=int, default=8, help='stub calls served at once')
+    parser.add_argument('--batching', action='store_true', help='run the app with LLM_BATCHING=1')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    mix = {'text': args.text_weight, 'scanned': args.scanned_weight, 'ask': args.ask_weight}
+    if mix['scanned'] and not tesseract_available():
+        print("Tesseract not found; dropping scanned statements from the mix")
+        mix['scanned'] = 0
+    mix = {kind: weight for kind, weight in mix.items() if weight > 0}
+
+    workdir = tempfile.mkdtemp(prefix='shadowfinance-loadtest-')
+    statements = {}
+    for kind, writer, pages in (('text', write_text_statement, args.text_pages),
+                                ('scanned', write_scanned_statement, args.scanned_pages)):
+        path = writer(os.path.join(workdir, f"{kind}.pdf"), pages=pages, seed=args.seed)
+        with open(path, 'rb') as f:
+            statements[kind] = f.read()
+
+    stub, stub_url = start_in_thread(latency=args.llm_latency, max_concurrency=args.llm_concurrency)
+    env = dict(os.environ, LLM_API_URL=f"{stub_url}/v1/chat/completions")
+    env.pop('NVIDIA_API_KEY', None)
+    env.pop('LLM_API_KEY', None)
+    if args.batching:
+        env['LLM_BATCHING'] = '1'
+
+    print(f"mix {mix}, {args.clients} clients, {args.workers} workers, {args.duration:.0f}s per class, "
+          f"stub LLM {args.llm_latency}s x {args.llm_concurrency} slots, logs in {workdir}")
+
+    available = worker_class_args(args.threads)
+    for name in args.classes.split(','):
+        name = name.strip()
+        if name not in available:
+            continue
+        port = free_port()
+        process = start_gunicorn(port, args.workers, available[name], env, os.path.join(workdir, f"gunicorn-{name}.log"))
+        peaks = {}
+        stop = threading.Event()
+        sampler = threading.Thread(target=sample_memory, args=(process.pid, peaks, stop), daemon=True)
+        sampler.start()
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            records, elapsed = run_load(base_url, mix, statements, args.clients, args.duration, args.seed)
+            detail_check = check_detail_endpoints(base_url, statements['text'])
+        finally:
+            stop.set()
+            sampler.join()
+            process.terminate()
+            process.wait(timeout=30)
+        report(name, records, elapsed, peaks, detail_check)
+
+    stub.shutdown()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,129 @@
+"""OpenAI-compatible stand-in LLM server for local testing and load tests.
+
+Serves /v1/chat/completions and the list-prompt form of /v1/completions with
+canned answers in the formats main.py parses. Each upstream call sleeps for a
+fixed latency (plus a small per-prompt cost for batches) and only
+``max_concurrency`` calls are served at once, mimicking a model server with a
+fixed number of slots.
+
+Usage:
+    python -m loadtest.llm_stub --port 8001 --latency 0.3
+    LLM_API_URL=http://127.0.0.1:8001/v1/chat/completions python main.py
+"""
+import argparse
+import threading
+import time
+import uuid
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+
+CANNED_ALERTS = """SEVERITY: high
+TITLE: 🔁 Recurring Charges Stack Up
+DESCRIPTION: Several merchants bill you every month. Some of them may overlap.
+IMPACT: ₹6000/year
+ACTION: Cancel the subscriptions you no longer use
+---
+SEVERITY: medium
+TITLE: ☕ Small Purchases Add Up
+DESCRIPTION: Many purchases fall between ₹20 and ₹200. Together they are a noticeable share of spending.
+IMPACT: ₹3600/year
+ACTION: Set a weekly budget for small purchases
+---"""
+
+CANNED_SUGGESTIONS = """- Review your recurring subscriptions and cancel the ones you rarely use.
+- Batch small purchases into a weekly budget.
+- Switch to an account without ATM or maintenance fees.
+- Enable auto-pay to avoid late payment penalties."""
+
+CANNED_ANSWER = "Based on your statement, recurring charges and small purchases are the biggest leaks. Trimming unused subscriptions is the quickest win."
+
+
+def canned_completion(prompt):
+    if 'SEVERITY:' in prompt:
+        return CANNED_ALERTS
+    if 'bullet points' in prompt:
+        return CANNED_SUGGESTIONS
+    return CANNED_ANSWER
+
+
+def create_app(latency=0.3, per_item_latency=0.01, max_concurrency=4):
+    app = Flask(__name__)
+    slots = threading.Semaphore(max_concurrency)
+    stats_lock = threading.Lock()
+    stats = {'calls': 0, 'prompts': 0}
+
+    def run_model(prompt_count):
+        with slots:
+            time.sleep(latency + per_item_latency * (prompt_count - 1))
+        with stats_lock:
+            stats['calls'] += 1
+            stats['prompts'] += prompt_count
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        data = request.get_json(force=True)
+        prompt = '\n'.join(m.get('content', '') for m in data.get('messages', []))
+        run_model(1)
+        return jsonify({
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'model': data.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': canned_completion(prompt)},
+                'finish_reason': 'stop'
+            }]
+        })
+
+    @app.route('/v1/completions', methods=['POST'])
+    def completions():
+        data = request.get_json(force=True)
+        prompts = data.get('prompt', '')
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        run_model(len(prompts))
+        return jsonify({
+            'id': f"cmpl-{uuid.uuid4().hex}",
+            'object': 'text_completion',
+            'model': data.get('model', 'stub'),
+            'choices': [
+                {'index': i, 'text': canned_completion(prompt), 'finish_reason': 'stop'}
+                for i, prompt in enumerate(prompts)
+            ]
+        })
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def start_in_thread(host='127.0.0.1', port=0, **kwargs):
+    """Start the stub on a background thread; returns (server, base_url)"""
+    server = make_server(host, port, create_app(**kwargs), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per upstream call')
+    parser.add_argument('--per-item-latency', type=float, default=0.01, help='extra seconds per additional prompt in a batch')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='calls served at once')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, create_app(
+        latency=args.latency,
+        per_item_latency=args.per_item_latency,
+        max_concurrency=args.max_concurrency
+    ), threaded=True)
+    print(f"Stub LLM listening on http://{args.host}:{server.server_port}/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
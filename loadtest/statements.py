@@ -0,0 +1,93 @@
+"""Synthetic bank statements (text-based and scanned) for load tests"""
+import random
+from PIL import Image, ImageDraw, ImageFont
+
+MERCHANTS = [
+    'SWIGGY FOOD ORDER', 'ZOMATO ONLINE', 'UBER TRIP', 'OLA CABS', 'AMAZON SHOPPING',
+    'FLIPKART RETAIL', 'NETFLIX SUBSCRIPTION', 'SPOTIFY PREMIUM', 'BIGBASKET GROCERY',
+    'STARBUCKS CAFE', 'IRCTC RAILWAY', 'HPCL PETROL PUMP', 'PVR CINEMA'
+]
+EXTRA_LINES = [
+    'ATM WITHDRAWAL FEE {amount} DR',
+    'SMS ALERT CHARGES {amount} DR',
+    'LATE PAYMENT PENALTY {amount} DR',
+    'SALARY CREDIT {amount} CR'
+]
+LINES_PER_PAGE = 40
+
+
+def statement_lines(count, seed=0):
+    rng = random.Random(seed)
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
+    lines = []
+    for _ in range(count):
+        date = f"{rng.randint(1, 28):02d} {rng.choice(months)} 2025"
+        if rng.random() < 0.1:
+            template = rng.choice(EXTRA_LINES)
+            lines.append(f"{date} {template.format(amount=f'{rng.uniform(20, 900):.2f}')}")
+        else:
+            lines.append(f"{date} {rng.choice(MERCHANTS)} {rng.uniform(20, 2500):.2f} DR")
+    return lines
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_statement(path, pages=2, seed=0):
+    """Write a text-based PDF with LINES_PER_PAGE transactions per page"""
+    lines = statement_lines(pages * LINES_PER_PAGE, seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_refs = []
+    for page in range(pages):
+        chunk = lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE]
+        stream = "BT /F1 10 Tf 14 TL 50 760 Td\n" + ''.join(f"({_pdf_escape(line)}) '\n" for line in chunk) + "ET"
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = b' '.join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b''.join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, 'wb') as f:
+        f.write(output)
+    return path
+
+
+def write_scanned_statement(path, pages=2, seed=0, dpi=150):
+    """Write an image-only PDF (no text layer), so extraction has to OCR it"""
+    lines = statement_lines(pages * LINES_PER_PAGE, seed)
+    try:
+        font = ImageFont.load_default(size=dpi // 7)
+    except TypeError:  # Pillow < 10.1 only has the fixed-size bitmap font
+        font = ImageFont.load_default()
+
+    images = []
+    for page in range(pages):
+        image = Image.new('L', (int(8.5 * dpi), 11 * dpi), 255)
+        draw = ImageDraw.Draw(image)
+        y = dpi // 2
+        for line in lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE]:
+            draw.text((dpi // 2, y), line, fill=0, font=font)
+            y += int(dpi / 4)
+        images.append(image)
+    images[0].save(path, 'PDF', resolution=dpi, save_all=True, append_images=images[1:])
+    return path
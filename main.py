@@ -1,17 +1,34 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, has_request_context
 from flask_cors import CORS
 import pdfplumber
+import pypdfium2
 import pytesseract
 import shutil
 import re
 import os
 import logging
 import tempfile
+import ctypes
 from werkzeug.utils import secure_filename
 import uuid
 import json
-import requests
+import math
+import gc
+import gzip
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from llm import LLMError, backend_from_env
+
+try:
+    from pdf2image import convert_from_path
+except ImportError:  # optional: low-memory OCR falls back to rendering with pdfium
+    convert_from_path = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
 
 # Load environment variables
 load_dotenv()
@@ -25,9 +42,34 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
-# NVIDIA AI Configuration
-NVIDIA_API_KEY = os.environ.get('NVIDIA_API_KEY')
-NVIDIA_API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
+# LLM configuration (NVIDIA by default, see llm.backend_from_env)
+llm_backend = backend_from_env()
+
+# Analysis detail lists are kept server-side so they can be paged instead of
+# being shipped (and stored in sessionStorage) in one blob. They are written to
+# a directory shared by all gunicorn workers, so any worker can serve a page.
+ANALYSIS_STORE_DIR = os.environ.get('ANALYSIS_STORE_DIR', os.path.join(tempfile.gettempdir(), 'shadowfinance-analyses'))
+ANALYSIS_STORE_SIZE = int(os.environ.get('ANALYSIS_STORE_SIZE', 256))
+ANALYSIS_STORE_TTL = int(os.environ.get('ANALYSIS_STORE_TTL', 3600))
+DETAIL_SECTIONS = ('repeating_charges', 'micro_transactions', 'fees', 'penalties')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Low-memory OCR renders each scanned page in grayscale into one reused buffer
+# (or temp file), at a DPI lowered if needed so the page bitmap fits
+# OCR_PAGE_BITMAP_MB, but never below OCR_MIN_DPI since Tesseract needs it
+LOW_MEMORY_OCR = os.environ.get('LOW_MEMORY_OCR', '').lower() in ('1', 'true', 'yes')
+OCR_RENDERER = os.environ.get('OCR_RENDERER', 'pdfium').lower()
+OCR_DPI = 300
+OCR_MIN_DPI = 150
+OCR_PAGE_BITMAP_MB = float(os.environ.get('OCR_PAGE_BITMAP_MB', 32))
+
+# Extraction stops with an error once the worker's RSS exceeds this (0 = off)
+EXTRACTION_MEMORY_BUDGET_MB = float(os.environ.get('EXTRACTION_MEMORY_BUDGET_MB', 0))
+
+# JSON responses smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 500
+
 
 # Allow users to set the tesseract executable path using environment variable
 # Useful on Windows if tesseract isn't on PATH or uses a custom install location
@@ -40,8 +82,38 @@ if os.environ.get('TESSERACT_CMD'):
         logger.warning(f"TESSERACT_CMD is set but the path does not exist: {tesseract_cmd}. "
                        "If Tesseract is installed, set TESSERACT_CMD to the full path or add tesseract to PATH.")
 
-def extract_transactions(pdf_path):
-    transactions = []
+@contextmanager
+def stage_timer(name):
+    """Time a request stage; the totals are reported in the Server-Timing header.
+
+    Nested stages are subtracted from the stage around them, so the reported
+    stages never overlap (e.g. 'detect' excludes the 'ai' calls it makes).
+    """
+    if not has_request_context():
+        yield
+        return
+    
+    nested = g.setdefault('stage_nested_ms', [])
+    nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        own = elapsed - nested.pop()
+        if nested:
+            nested[-1] += elapsed
+        timings = g.setdefault('stage_timings', {})
+        timings[name] = timings.get(name, 0) + own
+
+@app.after_request
+def add_server_timing(response):
+    timings = g.get('stage_timings')
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+    return response
+
+def is_tesseract_available():
     # check for tesseract either in PATH or via TESSERACT_CMD env var
     tesseract_env = os.environ.get('TESSERACT_CMD')
     tesseract_path = tesseract_env or shutil.which('tesseract')
@@ -59,9 +131,123 @@ def extract_transactions(pdf_path):
 
     if not tesseract_available:
         logger.debug("Tesseract command not found; OCR won't be available. Set TESSERACT_CMD or add tesseract to PATH.")
+    return tesseract_available
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when extraction pushes the worker past EXTRACTION_MEMORY_BUDGET_MB"""
+
+def current_rss_mb():
+    """Resident memory of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def check_memory_budget(page_num, total_pages):
+    if not EXTRACTION_MEMORY_BUDGET_MB:
+        return
+    rss = current_rss_mb()
+    if rss is not None and rss > EXTRACTION_MEMORY_BUDGET_MB:
+        # Freed page objects may still be waiting on the cycle collector
+        gc.collect()
+        rss = current_rss_mb()
+        if rss is not None and rss > EXTRACTION_MEMORY_BUDGET_MB:
+            raise MemoryBudgetExceeded(
+                f"RSS {rss:.0f} MB exceeds the {EXTRACTION_MEMORY_BUDGET_MB:.0f} MB budget "
+                f"after page {page_num} of {total_pages}"
+            )
+
+def ocr_dpi_for_page(page, page_num):
+    """Highest DPI (OCR_MIN_DPI..OCR_DPI) whose grayscale bitmap fits OCR_PAGE_BITMAP_MB"""
+    area_sq_in = (page.width / 72) * (page.height / 72)
+    max_dpi = int((OCR_PAGE_BITMAP_MB * 1024 * 1024 / area_sq_in) ** 0.5)
+    if max_dpi >= OCR_DPI:
+        return OCR_DPI
+    dpi = max(OCR_MIN_DPI, max_dpi)
+    bitmap_mb = area_sq_in * dpi * dpi / (1024 * 1024)
+    logger.warning(
+        f"Page {page_num}: rendering at {dpi} dpi instead of {OCR_DPI} to fit OCR_PAGE_BITMAP_MB="
+        f"{OCR_PAGE_BITMAP_MB:.0f}" + (f"; still {bitmap_mb:.1f} MB at the {OCR_MIN_DPI} dpi floor"
+                                       if bitmap_mb > OCR_PAGE_BITMAP_MB else "")
+    )
+    return dpi
+
+class LowMemoryOCR:
+    """OCR scanned pages one at a time with bounded memory.
+
+    Pages are rendered in grayscale at a DPI capped by OCR_PAGE_BITMAP_MB,
+    by pdfium into a single reused bitmap buffer. pdfium keeps decoded page
+    data for as long as a document is open, so it is reopened for every page.
+    OCR_RENDERER=pdf2image renders through poppler into a single reused temp
+    file instead; that starts one pdftoppm per page, and each one re-parses
+    the whole PDF.
+    """
+    
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.scratch_dir = None  # only the pdf2image path needs one
+        self.use_pdf2image = OCR_RENDERER == 'pdf2image'
+        if self.use_pdf2image and (convert_from_path is None or shutil.which('pdftoppm') is None):
+            logger.warning("OCR_RENDERER=pdf2image but pdf2image or poppler (pdftoppm) is missing; using pdfium")
+            self.use_pdf2image = False
+        self.buffer = None
+    
+    def _make_bitmap(self, width, height, format, rev_byteorder=False):
+        channels = 1 if format == pypdfium2.raw.FPDFBitmap_Gray else 4
+        size = width * height * channels
+        if self.buffer is None or len(self.buffer) < size:
+            self.buffer = (ctypes.c_ubyte * size)()
+        return pypdfium2.PdfBitmap.new_native(width, height, format, rev_byteorder, buffer=self.buffer)
+    
+    def ocr_page(self, page, page_num):
+        dpi = ocr_dpi_for_page(page, page_num)
+        if self.use_pdf2image:
+            try:
+                if self.scratch_dir is None:
+                    self.scratch_dir = tempfile.mkdtemp(prefix='ocr_')
+                # Overwrites the same file for every page, so disk use stays at one page
+                paths = convert_from_path(
+                    self.pdf_path, dpi=dpi, first_page=page_num, last_page=page_num,
+                    output_folder=self.scratch_dir, output_file='page', single_file=True,
+                    fmt='png', grayscale=True, paths_only=True
+                )
+                # pytesseract hands file paths straight to tesseract without loading them
+                return pytesseract.image_to_string(paths[0])
+            except Exception as render_error:
+                logger.warning(f"Page {page_num}: pdf2image render failed ({render_error}); using pdfium")
+        
+        # Unlike page.to_image(), no BGRX and RGB copies of the page are allocated
+        pdfium_doc = pypdfium2.PdfDocument(self.pdf_path)
+        try:
+            bitmap = pdfium_doc[page_num - 1].render(scale=dpi / 72, grayscale=True, bitmap_maker=self._make_bitmap)
+            image = bitmap.to_pil()  # shares memory with self.buffer
+            try:
+                return pytesseract.image_to_string(image)
+            finally:
+                image.close()
+                bitmap.close()
+        finally:
+            pdfium_doc.close()
+    
+    def close(self):
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+def extract_transactions(pdf_path):
+    transactions = []
+    tesseract_available = is_tesseract_available()
+    low_memory_ocr = LowMemoryOCR(pdf_path) if LOW_MEMORY_OCR else None
 
     try:
         with pdfplumber.open(pdf_path) as pdf:
+            if LOW_MEMORY_OCR:
+                # pdfminer otherwise keeps every parsed object (including the
+                # raw image streams of scanned pages) until the PDF is closed
+                pdf.doc.caching = False
             logger.info(f"PDF opened successfully. Total pages: {len(pdf.pages)}")
             for page_num, page in enumerate(pdf.pages, 1):
                 text = page.extract_text()
@@ -71,9 +257,12 @@ def extract_transactions(pdf_path):
                     try:
                         if not tesseract_available:
                             raise EnvironmentError("tesseract is not installed or TESSERACT_CMD is not set to a valid path")
-                        img = page.to_image(resolution=300)
-                        pil_image = img.original
-                        text = pytesseract.image_to_string(pil_image)
+                        if low_memory_ocr:
+                            text = low_memory_ocr.ocr_page(page, page_num)
+                        else:
+                            img = page.to_image(resolution=OCR_DPI)
+                            pil_image = img.original
+                            text = pytesseract.image_to_string(pil_image)
                         logger.info(f"Page {page_num}: OCR extracted {len(text)} characters")
                     except Exception as ocr_error:
                         logger.warning(
@@ -88,10 +277,19 @@ def extract_transactions(pdf_path):
                     lines = text.split('\n')
                     transactions.extend(lines)
                     logger.debug(f"Page {page_num}: Added {len(lines)} lines")
+                
+                # pdfplumber keeps parsed objects on every page until the PDF is closed
+                page.close()
+                check_memory_budget(page_num, len(pdf.pages))
             
             logger.info(f"Total transactions extracted: {len(transactions)}")
+    except MemoryBudgetExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error extracting PDF: {e}", exc_info=True)
+    finally:
+        if low_memory_ocr:
+            low_memory_ocr.close()
     return transactions
 
 def extract_merchant_name(line):
@@ -270,6 +468,7 @@ def detect_leaks(transactions):
     
     for charge in repeating_charges:
         category = categorize_transaction(charge['merchant'])
+        charge['category'] = category
         category_spending[category] += charge['total']
     
     top_merchants = sorted(
@@ -304,26 +503,28 @@ def detect_leaks(transactions):
     }
     
     # Generate AI-powered alerts (anomaly detection)
-    alerts = generate_ai_alerts(
-        repeating_charges=repeating_charges,
-        micro_transactions=micro_transactions,
-        fees=fees,
-        penalties=penalties,
-        category_spending=category_spending,
-        merchant_amounts=merchant_amounts,
-        merchant_counts=merchant_counts
-    )
+    with stage_timer('ai'):
+        alerts = generate_ai_alerts(
+            repeating_charges=repeating_charges,
+            micro_transactions=micro_transactions,
+            fees=fees,
+            penalties=penalties,
+            category_spending=category_spending,
+            merchant_amounts=merchant_amounts,
+            merchant_counts=merchant_counts
+        )
     
     # Generate AI-powered suggestions
-    suggestions = generate_ai_suggestions(
-        repeating_charges=repeating_charges,
-        micro_transactions=micro_transactions,
-        fees=fees,
-        penalties=penalties,
-        category_spending=category_spending,
-        total_waste=total_waste,
-        transaction_count=transaction_count
-    )
+    with stage_timer('ai'):
+        suggestions = generate_ai_suggestions(
+            repeating_charges=repeating_charges,
+            micro_transactions=micro_transactions,
+            fees=fees,
+            penalties=penalties,
+            category_spending=category_spending,
+            total_waste=total_waste,
+            transaction_count=transaction_count
+        )
     
     category_spending_list = [
         {'category': cat, 'amount': round(amt, 2)}
@@ -345,6 +546,124 @@ def detect_leaks(transactions):
         'total_waste': round(total_waste, 2)
     }
 
+def _analysis_path(analysis_id):
+    return os.path.join(ANALYSIS_STORE_DIR, f"{analysis_id}.json")
+
+def cleanup_analysis_store():
+    """Drop expired analyses and partial writes, then the oldest analyses beyond ANALYSIS_STORE_SIZE"""
+    now = time.time()
+    entries = []
+    for name in os.listdir(ANALYSIS_STORE_DIR):
+        # .tmp files are left behind by workers killed between write and rename
+        if not name.endswith(('.json', '.tmp')):
+            continue
+        path = os.path.join(ANALYSIS_STORE_DIR, name)
+        try:
+            mtime = os.path.getmtime(path)
+            if now - mtime > ANALYSIS_STORE_TTL:
+                os.remove(path)
+            elif name.endswith('.json'):
+                entries.append((mtime, path))
+        except OSError:
+            # Another worker removed it first
+            continue
+    entries.sort()
+    for _, path in entries[:max(0, len(entries) - ANALYSIS_STORE_SIZE)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def store_analysis(results):
+    """Persist the detail lists and return the id used to page through them"""
+    analysis_id = uuid.uuid4().hex
+    os.makedirs(ANALYSIS_STORE_DIR, exist_ok=True)
+    details = {section: results[section] for section in DETAIL_SECTIONS}
+    # Write then rename, so other workers never read a partial file
+    fd, temp_path = tempfile.mkstemp(dir=ANALYSIS_STORE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(details, f)
+        os.replace(temp_path, _analysis_path(analysis_id))
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    cleanup_analysis_store()
+    return analysis_id
+
+def get_analysis(analysis_id):
+    # Ids are only ever uuid4 hex; anything else must not reach the filesystem
+    if not re.fullmatch(r'[0-9a-f]{32}', analysis_id):
+        return None
+    path = _analysis_path(analysis_id)
+    try:
+        if time.time() - os.path.getmtime(path) > ANALYSIS_STORE_TTL:
+            os.remove(path)
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_summary(results):
+    """Strip the detail lists, keeping only what the dashboard needs for first paint"""
+    return {key: value for key, value in results.items() if key not in DETAIL_SECTIONS}
+
+def filter_section_items(section, items, category=None, min_amount=None, max_amount=None, query=None):
+    amount_key = 'total' if section == 'repeating_charges' else 'amount'
+    text_key = 'merchant' if section == 'repeating_charges' else 'line'
+    
+    filtered = []
+    for item in items:
+        if category and item.get('category', 'Other').lower() != category.lower():
+            continue
+        if min_amount is not None and item[amount_key] < min_amount:
+            continue
+        if max_amount is not None and item[amount_key] > max_amount:
+            continue
+        if query and query.lower() not in item[text_key].lower():
+            continue
+        filtered.append(item)
+    return filtered
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q=') and params[2:] in ('0', '0.0', '0.00', '0.000'):
+            continue
+        encodings.add(token)
+    return encodings
+
+@app.after_request
+def compress_response(response):
+    """Gzip/brotli-compress JSON responses when the client accepts it"""
+    if (response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    if brotli is not None and 'br' in encodings:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in encodings:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 @app.route('/')
 def index():
     return send_from_directory('static', 'index.html')
@@ -363,11 +682,15 @@ def serve_dashboard_js():
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    if 'file' not in request.files:
+    # Werkzeug receives and parses the whole multipart body on first access
+    with stage_timer('upload'):
+        files = request.files
+    
+    if 'file' not in files:
         logger.warning("No file in request")
         return jsonify({'error': 'No file uploaded'}), 400
     
-    file = request.files['file']
+    file = files['file']
     
     if file.filename == '':
         logger.warning("Empty filename")
@@ -377,6 +700,10 @@ def analyze():
         logger.warning(f"Invalid file type: {file.filename}")
         return jsonify({'error': 'Only PDF files are allowed'}), 400
 
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'summary'):
+        return jsonify({'error': "mode must be 'full' or 'summary'"}), 400
+
     safe_name = secure_filename(file.filename)
     # Save to system temp directory in a unique temp file
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f"_{uuid.uuid4().hex}_{safe_name}")
@@ -385,10 +712,15 @@ def analyze():
         logger.info(f"Saving file to: {temp_path}")
         # close so Werkzeug can write to the same file on Windows
         temp_file.close()
-        file.save(temp_path)
+        with stage_timer('upload'):
+            file.save(temp_path)
     
         logger.info("Extracting transactions from PDF...")
-        transactions = extract_transactions(temp_path)
+        with stage_timer('extract'):
+            transactions = extract_transactions(temp_path)
+    except MemoryBudgetExceeded as e:
+        logger.error(f"Stopped extraction: {e}")
+        return jsonify({'error': 'This statement is too large to process. Please upload fewer pages at a time.'}), 413
     except Exception as e:
         logger.error("Error handling uploaded file", exc_info=True)
         return jsonify({'error': 'Failed to process uploaded file'}), 500
@@ -405,16 +737,83 @@ def analyze():
         return jsonify({'error': 'Could not extract text from PDF. The PDF might be scanned/image-based or empty. Please upload a text-based PDF bank statement.'}), 400
     
     logger.info(f"Analyzing {len(transactions)} transactions...")
-    results = detect_leaks(transactions)
+    with stage_timer('detect'):
+        results = detect_leaks(transactions)
     logger.info(f"Analysis complete. Found {len(results['repeating_charges'])} repeating charges, {len(results['micro_transactions'])} micro transactions")
     
+    try:
+        results['analysis_id'] = store_analysis(results)
+    except OSError:
+        logger.error(f"Could not store analysis in {ANALYSIS_STORE_DIR}", exc_info=True)
+        # The full response already carries every detail list; the summary does not
+        if mode == 'summary':
+            return jsonify({'error': 'Could not save the analysis for paging. Please try again.'}), 500
+    
+    if mode == 'summary':
+        return jsonify(build_summary(results))
     return jsonify(results)
 
+@app.route('/analysis/<analysis_id>/<section>', methods=['GET'])
+def analysis_section(analysis_id, section):
+    """Paginated, filterable access to one detail list of a cached analysis"""
+    
+    if section not in DETAIL_SECTIONS:
+        return jsonify({'error': f"Unknown section '{section}'"}), 404
+    
+    results = get_analysis(analysis_id)
+    if results is None:
+        return jsonify({'error': 'Analysis not found or expired. Please upload the statement again.'}), 404
+    
+    invalid = []
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', DEFAULT_PAGE_SIZE))
+        if page < 1 or per_page < 1:
+            raise ValueError
+    except ValueError:
+        invalid.append('page and per_page must be positive integers')
+    
+    amounts = {}
+    for name in ('min_amount', 'max_amount'):
+        raw = request.args.get(name, '').strip()
+        try:
+            amounts[name] = float(raw) if raw else None
+            if amounts[name] is not None and not math.isfinite(amounts[name]):
+                raise ValueError
+        except ValueError:
+            invalid.append(f"{name} must be a finite number")
+    
+    if invalid:
+        return jsonify({'error': '; '.join(invalid)}), 400
+    per_page = min(per_page, MAX_PAGE_SIZE)
+    
+    items = filter_section_items(
+        section,
+        results[section],
+        category=request.args.get('category', '').strip(),
+        min_amount=amounts['min_amount'],
+        max_amount=amounts['max_amount'],
+        query=request.args.get('q', '').strip()
+    )
+    
+    total = len(items)
+    start = (page - 1) * per_page
+    
+    return jsonify({
+        'analysis_id': analysis_id,
+        'section': section,
+        'items': items[start:start + per_page],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page
+    })
+
 def generate_ai_alerts(repeating_charges, micro_transactions, fees, penalties, category_spending, merchant_amounts, merchant_counts):
-    """Use NVIDIA Llama to detect spending anomalies and generate alerts"""
+    """Use the configured LLM to detect spending anomalies and generate alerts"""
     
-    if not NVIDIA_API_KEY:
-        logger.warning("NVIDIA_API_KEY not set, generating rule-based alerts")
+    if llm_backend is None:
+        logger.warning("No LLM backend configured, generating rule-based alerts")
         alerts = []
         
         # Duplicate subscription detection
@@ -527,64 +926,44 @@ ACTION: [One specific action to take]
 
 Provide 3-5 alerts maximum. Be specific with merchant names and amounts."""
 
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        ai_response = llm_backend.complete(prompt, temperature=0.5, max_tokens=800, top_p=0.9, timeout=15)
         
-        data = {
-            "model": "meta/llama-3.1-8b-instruct",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.5,
-            "max_tokens": 800,
-            "top_p": 0.9,
-            "stream": False
-        }
-        
-        response = requests.post(NVIDIA_API_URL, headers=headers, json=data, timeout=15)
+        # Parse AI response into structured alerts
+        alerts = []
+        alert_blocks = ai_response.split('---')
         
-        if response.status_code == 200:
-            ai_response = response.json()['choices'][0]['message']['content']
+        for block in alert_blocks:
+            if not block.strip():
+                continue
             
-            # Parse AI response into structured alerts
-            alerts = []
-            alert_blocks = ai_response.split('---')
+            alert = {}
+            lines = [l.strip() for l in block.strip().split('\n') if l.strip()]
             
-            for block in alert_blocks:
-                if not block.strip():
-                    continue
-                
-                alert = {}
-                lines = [l.strip() for l in block.strip().split('\n') if l.strip()]
-                
-                for line in lines:
-                    if line.startswith('SEVERITY:'):
-                        severity = line.replace('SEVERITY:', '').strip().lower()
-                        alert['severity'] = severity if severity in ['critical', 'high', 'medium', 'low'] else 'medium'
-                    elif line.startswith('TITLE:'):
-                        alert['title'] = line.replace('TITLE:', '').strip()
-                    elif line.startswith('DESCRIPTION:'):
-                        alert['description'] = line.replace('DESCRIPTION:', '').strip()
-                    elif line.startswith('IMPACT:'):
-                        alert['impact'] = line.replace('IMPACT:', '').strip()
-                    elif line.startswith('ACTION:'):
-                        alert['action'] = line.replace('ACTION:', '').strip()
-                
-                # Only add if we have all required fields
-                if all(k in alert for k in ['severity', 'title', 'description', 'impact', 'action']):
-                    alerts.append(alert)
+            for line in lines:
+                if line.startswith('SEVERITY:'):
+                    severity = line.replace('SEVERITY:', '').strip().lower()
+                    alert['severity'] = severity if severity in ['critical', 'high', 'medium', 'low'] else 'medium'
+                elif line.startswith('TITLE:'):
+                    alert['title'] = line.replace('TITLE:', '').strip()
+                elif line.startswith('DESCRIPTION:'):
+                    alert['description'] = line.replace('DESCRIPTION:', '').strip()
+                elif line.startswith('IMPACT:'):
+                    alert['impact'] = line.replace('IMPACT:', '').strip()
+                elif line.startswith('ACTION:'):
+                    alert['action'] = line.replace('ACTION:', '').strip()
             
-            logger.info(f"Generated {len(alerts)} AI alerts")
-            return alerts if alerts else [{
-                'severity': 'low',
-                'title': 'No Critical Issues Found',
-                'description': 'AI analysis complete. No major anomalies detected.',
-                'impact': 'Your spending looks normal',
-                'action': 'Keep monitoring regularly'
-            }]
-        else:
-            logger.error(f"NVIDIA API error for alerts: {response.status_code}")
-            raise Exception("AI API failed")
+            # Only add if we have all required fields
+            if all(k in alert for k in ['severity', 'title', 'description', 'impact', 'action']):
+                alerts.append(alert)
+        
+        logger.info(f"Generated {len(alerts)} AI alerts")
+        return alerts if alerts else [{
+            'severity': 'low',
+            'title': 'No Critical Issues Found',
+            'description': 'AI analysis complete. No major anomalies detected.',
+            'impact': 'Your spending looks normal',
+            'action': 'Keep monitoring regularly'
+        }]
             
     except Exception as e:
         logger.error(f"Error generating AI alerts: {e}")
@@ -598,11 +977,11 @@ Provide 3-5 alerts maximum. Be specific with merchant names and amounts."""
         }]
 
 def generate_ai_suggestions(repeating_charges, micro_transactions, fees, penalties, category_spending, total_waste, transaction_count):
-    """Use NVIDIA Llama to generate personalized financial suggestions"""
+    """Use the configured LLM to generate personalized financial suggestions"""
     
-    if not NVIDIA_API_KEY:
-        # Fallback to rule-based suggestions if no API key
-        logger.warning("NVIDIA_API_KEY not set, using rule-based suggestions")
+    if llm_backend is None:
+        # Fallback to rule-based suggestions if no LLM is configured
+        logger.warning("No LLM backend configured, using rule-based suggestions")
         suggestions = []
         if len(repeating_charges) > 0:
             suggestions.append("Review your recurring subscriptions - you might be paying for services you no longer use.")
@@ -634,33 +1013,13 @@ Financial Data:
 
 Provide practical, specific suggestions. Be encouraging but direct. Format as bullet points."""
 
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": "meta/llama-3.1-8b-instruct",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 400,
-            "top_p": 1,
-            "stream": False
-        }
-        
-        response = requests.post(NVIDIA_API_URL, headers=headers, json=data, timeout=10)
-        
-        if response.status_code == 200:
-            ai_response = response.json()['choices'][0]['message']['content']
-            # Parse bullet points into list
-            suggestions = [line.strip('- •').strip() for line in ai_response.split('\n') if line.strip() and (line.strip().startswith('-') or line.strip().startswith('•'))]
-            if not suggestions:  # If no bullet points, split by newlines
-                suggestions = [s.strip() for s in ai_response.split('\n') if s.strip()]
-            logger.info(f"Generated {len(suggestions)} AI suggestions")
-            return suggestions[:5]  # Limit to 5 suggestions
-        else:
-            logger.error(f"NVIDIA API error: {response.status_code} - {response.text}")
-            raise Exception("AI API failed")
+        ai_response = llm_backend.complete(prompt, temperature=0.7, max_tokens=400, top_p=1, timeout=10)
+        # Parse bullet points into list
+        suggestions = [line.strip('- •').strip() for line in ai_response.split('\n') if line.strip() and (line.strip().startswith('-') or line.strip().startswith('•'))]
+        if not suggestions:  # If no bullet points, split by newlines
+            suggestions = [s.strip() for s in ai_response.split('\n') if s.strip()]
+        logger.info(f"Generated {len(suggestions)} AI suggestions")
+        return suggestions[:5]  # Limit to 5 suggestions
             
     except Exception as e:
         logger.error(f"Error generating AI suggestions: {e}")
@@ -682,7 +1041,7 @@ Provide practical, specific suggestions. Be encouraging but direct. Format as bu
 def ask_ai():
     """AI-powered financial assistant endpoint"""
     
-    if not NVIDIA_API_KEY:
+    if llm_backend is None:
         return jsonify({'error': 'AI service not configured'}), 503
     
     try:
@@ -693,14 +1052,21 @@ def ask_ai():
         if not user_query:
             return jsonify({'error': 'Query is required'}), 400
         
+        # Summary-mode results carry counts in category_summary instead of the full lists
+        category_summary = analysis_data.get('category_summary', {})
+        counts = {
+            section: category_summary.get(section, {}).get('count', len(analysis_data.get(section, [])))
+            for section in DETAIL_SECTIONS
+        }
+        
         # Prepare context from analysis data
         context = f"""Transaction Analysis:
 - Total Transactions: {analysis_data.get('transaction_count', 0)}
 - Money Wasted: ₹{analysis_data.get('total_waste', 0)}
-- Repeating Charges: {len(analysis_data.get('repeating_charges', []))} items
-- Micro-Transactions: {len(analysis_data.get('micro_transactions', []))} items
-- Fees: {len(analysis_data.get('fees', []))} items
-- Penalties: {len(analysis_data.get('penalties', []))} items
+- Repeating Charges: {counts['repeating_charges']} items
+- Micro-Transactions: {counts['micro_transactions']} items
+- Fees: {counts['fees']} items
+- Penalties: {counts['penalties']} items
 
 Top Merchants: {', '.join([m['name'] for m in analysis_data.get('top_merchants', [])[:3]])}
 
@@ -708,28 +1074,13 @@ User Question: {user_query}
 
 Provide a helpful, specific answer with numbers from the data. Be conversational and encouraging."""
 
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "meta/llama-3.1-8b-instruct",
-            "messages": [{"role": "user", "content": context}],
-            "temperature": 0.7,
-            "max_tokens": 500,
-            "top_p": 1,
-            "stream": False
-        }
-        
-        response = requests.post(NVIDIA_API_URL, headers=headers, json=payload, timeout=15)
-        
-        if response.status_code == 200:
-            ai_answer = response.json()['choices'][0]['message']['content']
-            return jsonify({'answer': ai_answer})
-        else:
-            logger.error(f"NVIDIA API error: {response.status_code} - {response.text}")
+        try:
+            with stage_timer('ai'):
+                ai_answer = llm_backend.complete(context, temperature=0.7, max_tokens=500, top_p=1, timeout=15)
+        except LLMError as e:
+            logger.error(f"LLM error in ask-ai: {e}")
             return jsonify({'error': 'AI service unavailable'}), 503
+        return jsonify({'answer': ai_answer})
             
     except Exception as e:
         logger.error(f"Error in ask-ai endpoint: {e}", exc_info=True)
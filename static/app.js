@@ -65,7 +65,7 @@ analyzeBtn.addEventListener('click', async () => {
     analyzeBtn.disabled = true;
     
     try {
-        const response = await fetch('/analyze', {
+        const response = await fetch('/analyze?mode=summary', {
             method: 'POST',
             body: formData
         });
@@ -13,6 +13,17 @@ function toggleSection(sectionId) {
 
 let analysisResults = null; // Global variable to store results for AI context
 
+const DETAIL_PAGE_SIZE = 50;
+
+// Detail lists are fetched page by page from the server in summary mode
+const detailSections = {
+    repeating_charges: { containerId: 'repeatingCharges', render: displayRepeatingCharges },
+    micro_transactions: { containerId: 'microTransactions', render: displayMicroTransactions },
+    fees: { containerId: 'fees', render: displayFees },
+    penalties: { containerId: 'penalties', render: displayPenalties }
+};
+const sectionState = {};
+
 function loadResults() {
     const dataStr = sessionStorage.getItem('analysisResults');
     
@@ -47,16 +58,58 @@ function displayResults(data) {
     displayCategorySummary(data.category_summary);
     displaySuggestions(data.suggestions);
     
-    displayRepeatingCharges(data.repeating_charges);
-    displayMicroTransactions(data.micro_transactions);
-    displayFees(data.fees);
-    displayPenalties(data.penalties);
+    Object.entries(detailSections).forEach(([section, config]) => {
+        if (data[section]) {
+            config.render(data[section]);
+        } else {
+            loadSectionPage(section, 1);
+        }
+    });
     
     // Render charts
     createCategoryPieChart(data);
     createMerchantsBarChart(data);
 }
 
+async function loadSectionPage(section, page) {
+    const config = detailSections[section];
+    const container = document.getElementById(config.containerId);
+    
+    try {
+        const response = await fetch(`/analysis/${analysisResults.analysis_id}/${section}?page=${page}&per_page=${DETAIL_PAGE_SIZE}`);
+        const data = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to load details');
+        }
+        
+        const previous = page > 1 && sectionState[section] ? sectionState[section].items : [];
+        sectionState[section] = { items: previous.concat(data.items), page: data.page, pages: data.pages, total: data.total };
+        config.render(sectionState[section].items);
+        
+        if (data.page < data.pages) {
+            const remaining = data.total - sectionState[section].items.length;
+            const button = document.createElement('button');
+            button.className = 'mt-4 w-full py-2 text-sm font-semibold text-emerald-700 bg-emerald-50 hover:bg-emerald-100 rounded-lg transition-colors';
+            button.textContent = `Load more (${remaining} remaining)`;
+            button.addEventListener('click', () => {
+                button.disabled = true;
+                loadSectionPage(section, data.page + 1);
+            });
+            container.appendChild(button);
+        }
+    } catch (error) {
+        console.error(`Error loading ${section}:`, error);
+        container.innerHTML = `<p class="text-red-600 italic">${escapeHtml(error.message)}</p>`;
+    }
+    
+    // Keep an expanded section sized to its new content
+    const content = document.getElementById(config.containerId + 'Content');
+    if (content && content.style.maxHeight && content.style.maxHeight !== '0px') {
+        content.style.maxHeight = content.scrollHeight + 'px';
+    }
+}
+
 function displayAlerts(alerts) {
     const container = document.getElementById('alertsSection');
     